@@ -4,26 +4,54 @@ Generate a word map/cloud from GitHub issues descriptions.
 Extracts keywords from the Description field of issues.
 """
 
-import json
+import csv
+import hashlib
+import os
+import pickle
 import re
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+import ijson
+from PIL import Image, ImageDraw, ImageFont
 from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+
+# Regexes used per issue, compiled once at import
+_DESC_HEADING = '### Description\n\n'
+_DESC_RE = re.compile(r'### Description\s*\n\n(.*?)(?=\n### |\Z)', re.DOTALL | re.IGNORECASE)
+# Letters are matched as [^\W\d_] so accented words stay whole. A token may not
+# start inside a letter/digit run, so numbers with units (3D, 16bit, 5min) are
+# skipped entirely rather than leaving fragments like "D" or "bit"
+_TOKEN_RE = re.compile(r'(?<![^\W_])[^\W\d_](?:(?:[^\W\d_]|-)*[^\W\d_])?')
+
+# Common suffixes to remove, stored as a trie over reversed characters
+_SUFFIXES = ['ing', 'ed', 'es', 's', 'tion', 'ation', 'ly', 'ment', 'ness', 'er', 'or', 'ist', 'ity', 'al']
+_SUFFIX_END = object()
+_SUFFIX_TRIE = {}
+for _suffix in _SUFFIXES:
+    _node = _SUFFIX_TRIE
+    for _char in reversed(_suffix):
+        _node = _node.setdefault(_char, {})
+    _node[_SUFFIX_END] = True
 
 # Simple stemming function
 def simple_stem(word):
     """Simple stemming to group related words."""
-    # Common suffixes to remove
-    suffixes = ['ing', 'ed', 'es', 's', 'tion', 'ation', 'ly', 'ment', 'ness', 'er', 'or', 'ist', 'ity', 'al']
-    
     word = word.lower()
-    for suffix in suffixes:
-        if word.endswith(suffix) and len(word) > len(suffix) + 2:
-            return word[:-len(suffix)]
-    return word
+    
+    # Walk the trie from the end of the word and strip the longest suffix
+    # that still leaves more than two characters
+    node = _SUFFIX_TRIE
+    strip = 0
+    for depth, char in enumerate(reversed(word), 1):
+        node = node.get(char)
+        if node is None:
+            break
+        if _SUFFIX_END in node and len(word) - depth > 2:
+            strip = depth
+    return word[:-strip] if strip else word
 
 # Common stop words to exclude
-STOP_WORDS = {
+STOP_WORDS = frozenset({
     'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he',
     'in', 'is', 'it', 'its', 'of', 'on', 'that', 'the', 'to', 'was', 'will',
     'with', 'i', 'am', 'my', 'we', 'this', 'have', 'been', 'would', 'using',
@@ -64,7 +92,7 @@ STOP_WORDS = {
     'india', 'indian', 'delhi', 'mumbai', 'brazil', 'brazilian', 'mexico', 'mexican',
     'argentina', 'chile', 'peru', 'colombia', 'africa', 'african', 'kenya', 'egypt',
     'europe', 'european', 'asia', 'asian', 'kyushu', 'louisville'
-}
+})
 
 # Canonical forms for specific word groups
 CANONICAL_FORMS = {
@@ -98,7 +126,7 @@ CANONICAL_FORMS = {
 }
 
 # Common first names to filter out
-COMMON_NAMES = {
+COMMON_NAMES = frozenset({
     'john', 'mary', 'michael', 'sarah', 'david', 'james', 'robert', 'jennifer',
     'william', 'linda', 'richard', 'patricia', 'charles', 'barbara', 'joseph',
     'elizabeth', 'thomas', 'susan', 'christopher', 'jessica', 'daniel', 'karen',
@@ -126,108 +154,200 @@ COMMON_NAMES = {
     'louis', 'addison', 'bobby', 'natalie', 'philip', 'lillian', 'johnny', 'leah',
     'karly', 'cohen', 'murat', 'maga', 'luke', 'rose', 'yuto', 'sano', 'anthony',
     'lee', 'annika', 'dawley', 'participant'
-}
+})
+
+# Single lookup table for the keyword filter: dropped words map to None,
+# canonical forms map to their replacement
+_WORD_TABLE = dict.fromkeys(STOP_WORDS | COMMON_NAMES)
+_WORD_TABLE.update(CANONICAL_FORMS)
 
 def extract_description(body_text):
     """Extract the Description field content from issue body."""
     if not body_text:
         return ""
     
+    # Fast path: issue form bodies start with the Description heading followed
+    # directly by text, so the section can be sliced out with str.find (same
+    # result as the regex, which would otherwise skip over extra blank lines)
+    start = len(_DESC_HEADING)
+    if body_text.startswith(_DESC_HEADING) and not body_text[start:start + 1].isspace():
+        end = body_text.find('\n### ', start)
+        return body_text[start:end if end != -1 else None].strip()
+    
     # Look for the ### Description section
     # Extract content between ### Description and the next ### section
-    description_match = re.search(
-        r'### Description\s*\n\n(.*?)(?=\n### |\Z)', 
-        body_text, 
-        re.DOTALL | re.IGNORECASE
-    )
+    description_match = _DESC_RE.search(body_text)
     
     if description_match:
         return description_match.group(1).strip()
     return ""
 
-def is_likely_name(word):
-    """Check if a word is likely a person's name."""
-    if not word or len(word) == 0:
-        return False
-    
-    # Check if word is in common names list
-    if word.lower() in COMMON_NAMES:
-        return True
-    
-    # Check if word looks like a proper name (has uppercase)
-    # but exclude common acronyms and technical terms
-    if word[0].isupper() and len(word) > 2:
-        # Allow certain uppercase patterns that are technical
-        if word.isupper():  # All caps (like CT, MRI) - keep these
-            return False
-        # Mixed case likely indicates a proper name
-        return True
-    
-    return False
-
-def extract_keywords(text):
-    """Extract meaningful keywords from text."""
+def accumulate_keywords(text, counts):
+    """Count meaningful keywords from text into the counts dict."""
     if not text:
-        return []
-    
-    # Store original case for name detection
-    original_text = text
-    
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove common phrases and patterns
-    text = re.sub(r'\d+[a-z]*', '', text)  # Remove numbers
-    text = re.sub(r'[^\w\s-]', ' ', text)  # Keep only words and hyphens
-    
-    # Get original words with case preserved for name detection
-    original_words = original_text.split()
-    
-    # Split into words
-    words = text.split()
+        return
     
-    # Filter words: remove stop words, short words, names, and keep meaningful terms
-    keywords = []
-    for i, word in enumerate(words):
-        word = word.strip('-')
+    # Filter words: remove stop words, short words, names, and keep meaningful terms.
+    # Tokens are matched on the original text so case is available for name detection.
+    for match in _TOKEN_RE.finditer(text):
+        orig_word = match.group()
+        word = orig_word.lower()
         
-        # Get the original case version for name checking
-        orig_word = original_words[i].strip('-.,!?;:') if i < len(original_words) else word
+        # Stop words and names map to None, canonical forms to their replacement
+        mapped = _WORD_TABLE.get(word, word)
+        if mapped is None:
+            continue
         
-        if (len(word) >= 3 and 
-            word not in STOP_WORDS and 
-            not word.isdigit() and
-            not is_likely_name(orig_word)):
-            
-            # Apply canonical form if it exists
-            if word in CANONICAL_FORMS:
-                keywords.append(CANONICAL_FORMS[word])
-            else:
-                keywords.append(word)
-    
-    return keywords
+        # Only words outside the table need the length and proper-name checks.
+        # Tokens are letters and hyphens, so no digit check is needed.
+        # Mixed case likely indicates a proper name; all caps (like CT, MRI) are kept
+        if mapped is word and (len(word) < 3 or
+                               (orig_word[0].isupper() and not orig_word.isupper())):
+            continue
+        
+        counts[mapped] = counts.get(mapped, 0) + 1
 
-def main():
-    # Load the issues
-    with open('/Users/amaga/all_issues.json', 'r') as f:
-        issues = json.load(f)
+# Per-issue keyword counts keyed by a hash of the issue body, holding only
+# the bodies seen in the latest run. The cache is stamped with a fingerprint
+# of the filter rules so edits to the word lists or the tokenizer invalidate
+# it. Bump CACHE_VERSION when the filtering logic in accumulate_keywords changes.
+CACHE_FILE = '/Users/amaga/wordmap_cache.pkl'
+CACHE_VERSION = 2
+_CACHE_FINGERPRINT = hashlib.blake2b(
+    repr((CACHE_VERSION, _DESC_RE.pattern, _TOKEN_RE.pattern, sorted(_WORD_TABLE.items()))).encode(),
+    digest_size=16
+).hexdigest()
+
+def load_cache(path):
+    """Load cached per-issue keyword counts, or an empty cache if stale, missing or corrupt."""
+    # A bad cache file must never stop the run; unpickling corrupt data can
+    # raise almost any exception type
+    try:
+        with open(path, 'rb') as f:
+            fingerprint, entries = pickle.load(f)
+    except Exception:
+        return {}
     
-    print(f"Loaded {len(issues)} issues")
+    if fingerprint != _CACHE_FINGERPRINT or not isinstance(entries, dict):
+        return {}
+    return entries
+
+def save_cache(path, entries):
+    """Write per-issue keyword counts to the cache file."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump((_CACHE_FINGERPRINT, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def body_key(body):
+    """Return the cache key for an issue body."""
+    return hashlib.blake2b((body or '').encode(), digest_size=16).hexdigest()
+
+def issue_keyword_counts(body):
+    """Return keyword counts for an issue body, or None if it has no description."""
+    description = extract_description(body)
+    if not description:
+        return None
     
+    issue_counts = {}
+    accumulate_keywords(description, issue_counts)
+    return issue_counts
+
+def count_batch(bodies):
+    """Return keyword counts for a batch of issue bodies; runs in worker processes."""
+    return [issue_keyword_counts(body) for body in bodies]
+
+def store_batch(results, cache, slots, keys, batch_counts):
+    """Put a batch's keyword counts into their result slots and the cache."""
+    for slot, key, issue_counts in zip(slots, keys, batch_counts):
+        cache[key] = issue_counts
+        results[slot] = issue_counts
+
+# Issues per batch, whether tokenized inline or sent to a worker process.
+# Per-issue work is small, so batching amortizes pickling and IPC.
+ISSUES_PER_TASK = 128
+
+# Batches submitted but not yet collected. Capping this bounds how many
+# uncached bodies are held in memory while the file is still streaming.
+MAX_PENDING_TASKS = 2 * (os.cpu_count() or 1)
+
+# Uncached issues to tokenize inline before starting worker processes. A few
+# hundred issues take well under a second serially, while spawned workers
+# (the default on macOS) each re-import wordcloud, PIL and ijson first.
+POOL_MIN_ISSUES = 10000
+
+def main():
     # Extract descriptions and collect keywords
     # Now we apply canonical forms before stemming
-    keyword_counts = Counter()
-    processed_count = 0
+    cache = load_cache(CACHE_FILE)
+    # Only bodies seen in this run are saved, so edited and deleted issues drop out
+    seen_cache = {}
+    results = []
+    tasks = deque()
+    batch_slots, batch_keys, batch_bodies = [], [], []
+    issue_count = 0
     
-    for issue in issues:
-        body = issue.get('body', '')
-        description = extract_description(body)
+    # Stream the issues and tokenize those missing from the cache. The first
+    # POOL_MIN_ISSUES uncached issues are tokenized inline; past that, batches
+    # go to worker processes, keeping at most MAX_PENDING_TASKS in flight.
+    pool = None
+    uncached_count = 0
+    try:
+        with open('/Users/amaga/all_issues.json', 'rb') as f:
+            for issue in ijson.items(f, 'item'):
+                issue_count += 1
+                body = issue.get('body', '')
+                key = body_key(body)
+                
+                if key in cache:
+                    seen_cache[key] = cache[key]
+                    results.append(cache[key])
+                    continue
+                
+                # Reserve the issue's slot so results stay in file order; tied
+                # counts keep insertion order in the Counter and the CSV
+                uncached_count += 1
+                batch_slots.append(len(results))
+                results.append(None)
+                batch_keys.append(key)
+                batch_bodies.append(body)
+                if len(batch_bodies) < ISSUES_PER_TASK:
+                    continue
+                
+                if pool is None and uncached_count < POOL_MIN_ISSUES:
+                    store_batch(results, seen_cache, batch_slots, batch_keys, count_batch(batch_bodies))
+                else:
+                    if pool is None:
+                        pool = ProcessPoolExecutor()
+                    tasks.append((batch_slots, batch_keys, pool.submit(count_batch, batch_bodies)))
+                    if len(tasks) >= MAX_PENDING_TASKS:
+                        slots, keys, future = tasks.popleft()
+                        store_batch(results, seen_cache, slots, keys, future.result())
+                batch_slots, batch_keys, batch_bodies = [], [], []
+        
+        if batch_bodies:
+            store_batch(results, seen_cache, batch_slots, batch_keys, count_batch(batch_bodies))
         
-        if description:
-            keywords = extract_keywords(description)
-            keyword_counts.update(keywords)
+        for slots, keys, future in tasks:
+            store_batch(results, seen_cache, slots, keys, future.result())
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    # Each issue's counts are already deduplicated, so the global Counter is
+    # updated once per unique keyword per issue rather than once per occurrence
+    keyword_counts = Counter()
+    processed_count = 0
+    for issue_counts in results:
+        if issue_counts is not None:
+            keyword_counts.update(issue_counts)
             processed_count += 1
     
+    print(f"Loaded {issue_count} issues")
+    
+    if seen_cache.keys() != cache.keys():
+        save_cache(CACHE_FILE, seen_cache)
+    
     print(f"Processed {processed_count} issues with descriptions")
     print(f"Total unique keywords: {len(keyword_counts)}")
     
@@ -238,13 +358,15 @@ def main():
     # Print top 50 keywords
     print("\nTop 50 Keywords:")
     print("-" * 60)
-    for i, (word, count) in enumerate(sorted(keyword_counts.items(), key=lambda x: x[1], reverse=True)[:50], 1):
+    for i, (word, count) in enumerate(keyword_counts.most_common(50), 1):
         print(f"{i:2d}. {word:30s} ({count:3d})")
     
-    # Generate word cloud
+    # Generate word cloud. The layout is computed at 1600x900 and drawn at
+    # 3.75x, matching the ~6000 px wide output of the old 300 dpi savefig
     wordcloud = WordCloud(
         width=1600,
         height=900,
+        scale=3.75,
         background_color='white',
         colormap='twilight_shifted',
         relative_scaling=0.5,
@@ -252,24 +374,27 @@ def main():
         max_words=200
     ).generate_from_frequencies(keyword_counts)
     
-    # Create and save visualization
-    plt.figure(figsize=(20, 11))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis('off')
-    plt.title('MorphoCloud Issues - Keyword Word Map', fontsize=24, pad=20)
-    plt.tight_layout(pad=0)
+    # Add a title band above the word cloud image
+    cloud_image = wordcloud.to_image()
+    title = 'MorphoCloud Issues - Keyword Word Map'
+    title_height = int(100 * wordcloud.scale)
+    image = Image.new('RGB', (cloud_image.width, cloud_image.height + title_height), 'white')
+    image.paste(cloud_image, (0, title_height))
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.truetype(wordcloud.font_path, int(48 * wordcloud.scale))
+    draw.text((image.width // 2, title_height // 2), title, fill='black', font=font, anchor='mm')
     
     # Save to file
     output_file = '/Users/amaga/wordmap.png'
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    image.save(output_file)
     print(f"\nWord map saved to: {output_file}")
     
     # Also save keyword frequencies to CSV
     csv_file = '/Users/amaga/keyword_frequencies.csv'
-    with open(csv_file, 'w') as f:
-        f.write("Keyword,Frequency\n")
-        for word, count in sorted(keyword_counts.items(), key=lambda x: x[1], reverse=True):
-            f.write(f'"{word}",{count}\n')
+    with open(csv_file, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['Keyword', 'Frequency'])
+        writer.writerows(keyword_counts.most_common())
     print(f"Keyword frequencies saved to: {csv_file}")
 
 if __name__ == "__main__":